@@ -0,0 +1,311 @@
+import ast
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def sample_dataset(rows=2000):
+    """Small synthetic logistics dataset with the columns the dashboard expects."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2021-01-01', periods=rows, freq='h'),
+        'vehicle_gps_latitude': rng.uniform(-45, 65, rows),
+        'vehicle_gps_longitude': rng.uniform(-130, 150, rows),
+        'fuel_consumption_rate': rng.uniform(5, 20, rows),
+        'traffic_congestion_level': rng.uniform(0, 10, rows),
+        'order_fulfillment_status': rng.uniform(0, 1, rows),
+        'shipping_costs': rng.uniform(100, 1000, rows),
+        'cargo_condition_status': rng.uniform(0, 1, rows),
+        'driver_behavior_score': rng.uniform(0, 1, rows),
+        'delay_probability': rng.uniform(0, 1, rows),
+        'risk_classification': rng.choice(['Low Risk', 'Moderate Risk', 'High Risk'], rows),
+        'delivery_time_deviation': rng.uniform(-2, 10, rows),
+    })
+
+
+@pytest.fixture(scope="module")
+def app():
+    """The dashboard's imports, constants, functions and classes, without running its script body.
+    
+    Fragments are left out; they are page sections that read script state.
+    """
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    definitions = [
+        node for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.ClassDef))
+        or (isinstance(node, ast.FunctionDef) and not any('fragment' in ast.unparse(d) for d in node.decorator_list))
+        or (isinstance(node, ast.Assign) and all(isinstance(t, ast.Name) and t.id.isupper() for t in node.targets))
+    ]
+    namespace = {'__file__': APP_PATH}
+    exec(compile(ast.Module(body=definitions, type_ignores=[]), APP_PATH, "exec"), namespace)
+    return SimpleNamespace(**namespace)
+
+
+def test_data_management_single_day_range(tmp_path, monkeypatch):
+    """A one-day date range renders Data Management without duplicate widget ids."""
+    monkeypatch.chdir(tmp_path)
+    sample_dataset().to_csv(tmp_path / "dynamic_supply_chain_logistics_dataset.csv", index=False)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=180)
+    at.run()
+    start_date, _ = (widget.value for widget in at.get("date_input"))
+    at.get("date_input")[1].set_value(start_date).run()
+
+    assert not at.exception
+    assert at.number_input(key="action_page").value == 1
+
+    at.radio(key="active_view").set_value("Data Management").run()
+
+    assert not at.exception
+    assert at.number_input(key="explorer_page").value == 1
+
+
+
+def test_map_assigns_small_island_countries(tmp_path, monkeypatch):
+    """Shipments in Singapore and Bahrain are not absorbed by neighbouring outlines."""
+    monkeypatch.chdir(tmp_path)
+    df = sample_dataset()
+    # Singapore, Bahrain (Manama), Johor Bahru (Malaysia) and Al Khobar (Saudi Arabia)
+    points = [(1.35, 103.82), (26.23, 50.59), (1.49, 103.74), (26.28, 50.21)]
+    for i, (lat, lon) in enumerate(points):
+        df.loc[i::len(points), ['vehicle_gps_latitude', 'vehicle_gps_longitude']] = (lat, lon)
+    df.to_csv(tmp_path / "dynamic_supply_chain_logistics_dataset.csv", index=False)
+
+    at = AppTest.from_file(APP_PATH, default_timeout=180)
+    at.run()
+    at.radio(key="active_view").set_value("Global Map View").run()
+
+    assert not at.exception
+    deck = json.loads(at.get("deck_gl_json_chart")[0].proto.json)
+    countries = {
+        row['country']
+        for layer in deck['layers'] if layer.get('@@type') == 'ScatterplotLayer'
+        for row in layer['data']
+    }
+    assert countries == {'Singapore', 'Bahrain', 'Malaysia', 'Saudi Arabia'}
+
+
+def test_live_appends_match_full_load(app, tmp_path):
+    """Rows appended to a live source in pieces give the same frame and KPIs as loading them at once."""
+    df = sample_dataset()
+    df.loc[::7, 'shipping_costs'] = np.nan
+    # The first chunk holds a single risk label; later rows arrive out of order once
+    df.loc[:4, 'risk_classification'] = 'Low Risk'
+    df.loc[1500:1599, 'timestamp'] -= pd.Timedelta(days=30)
+    feed = tmp_path / "feed.csv"
+    lines = df.to_csv(index=False).splitlines(keepends=True)
+    store = app.load_live_store(str(feed))
+    
+    versions = []
+    for start, stop in [(0, 6), (6, 1200), (1200, 1501), (1501, len(lines))]:
+        with open(feed, 'a') as f:
+            f.writelines(lines[start:stop])
+        snapshot = app.refresh_live_store(store, str(feed))
+        assert isinstance(snapshot['frame']['risk_classification'].dtype, pd.CategoricalDtype)
+        versions.append(snapshot['version'])
+    # Only the out-of-order append changes the version
+    assert versions[0] == versions[1] == versions[2] != versions[3]
+    assert snapshot['resorted']
+    
+    expected, _ = app.enrich_dataset(app.standardize_timestamp(pd.read_csv(feed)), str(feed))
+    pd.testing.assert_frame_equal(snapshot['frame'], expected, check_categorical=False)
+    live, full = snapshot['kpis'], app.compute_kpis(expected)
+    assert live.shipments == full.shipments
+    assert live.high_risk_count == full.high_risk_count
+    assert live.cost_efficiency == full.cost_efficiency
+    assert live.avg_cost == pytest.approx(full.avg_cost)
+
+
+def test_cached_indexes_extend_with_appended_rows(app):
+    """Filter bitmaps, sort and search indexes and the map pyramid extended row by row match a fresh build."""
+    df, _ = app.enrich_dataset(sample_dataset(), "indexes")
+    df.loc[::5, 'shipping_costs'] = np.nan
+    df['risk_classification'] = df['risk_classification'].cat.set_categories(['Low Risk', 'High Risk'])
+    
+    for n_rows in [3, 1001, len(df)]:
+        rows = df.iloc[:n_rows]
+        packed = app.cached_filter_mask(
+            'cost', (500,), 'extended', n_rows, lambda part: rows['shipping_costs'].iloc[part] > 500)
+        order, missing = app.column_sort_order(rows, 'extended', 'shipping_costs')
+        risk_order, _ = app.column_sort_order(rows, 'extended', 'risk_classification')
+        matches = app.column_search_mask(rows, 'extended', 'risk_classification', 'high')
+        pyramid = app.load_map_pyramid(rows, 'extended')
+    
+    assert np.array_equal(packed, np.packbits(df['shipping_costs'].to_numpy() > 500))
+    stable = df['shipping_costs'].sort_values(kind='stable', na_position='last').index.to_numpy()
+    assert np.array_equal(np.concatenate([order, missing]), stable)
+    assert np.array_equal(risk_order, df['risk_classification'].dropna().sort_values(kind='stable').index.to_numpy())
+    assert np.array_equal(matches, (df['risk_classification'] == 'High Risk').to_numpy())
+    for level, fresh in zip(pyramid, app.load_map_pyramid(df, 'fresh')):
+        assert np.array_equal(level['lat'][level['row_cells']], fresh['lat'][fresh['row_cells']])
+        assert np.array_equal(level['lon'][level['row_cells']], fresh['lon'][fresh['row_cells']])
+
+
+def test_classify_regions_matches_scalar_lookup(app):
+    """The vectorized region classifier agrees with get_country_region, including box edges and overlaps."""
+    rng = np.random.default_rng(1)
+    lat = list(rng.uniform(-90, 90, 5000)) + [np.nan, 10.0]
+    lon = list(rng.uniform(-180, 180, 5000)) + [10.0, np.nan]
+    # Every box corner, plus points where boxes overlap (France/Spain, India/China)
+    for _, lat_min, lat_max, lon_min, lon_max in app.REGION_BOUNDING_BOXES:
+        for corner_lat in (lat_min, lat_max):
+            for corner_lon in (lon_min, lon_max):
+                lat.append(corner_lat)
+                lon.append(corner_lon)
+    lat += [41.5, 30.0, 47.0]
+    lon += [2.0, 80.0, 8.0]
+    
+    vectorized = app.classify_regions(lat, lon)
+    assert list(vectorized) == [app.get_country_region(a, b) for a, b in zip(lat, lon)]
+
+
+def filtered_rows(df, start_date, end_date, risks, deviation_range, cargo_range):
+    """The sidebar filters applied with plain pandas comparisons."""
+    return df[
+        (df['timestamp'].dt.normalize() >= pd.Timestamp(start_date))
+        & (df['timestamp'].dt.normalize() <= pd.Timestamp(end_date))
+        & df['risk_classification'].isin(risks)
+        & df['delivery_time_deviation'].between(*deviation_range)
+        & df['cargo_condition_status'].between(*cargo_range)
+    ]
+
+
+@pytest.mark.parametrize("missing_deviation", [False, True])
+def test_rollup_kpis_match_filtered_frame(app, missing_deviation):
+    """KPIs answered from the rollup cube equal compute_kpis over the filtered rows.
+    
+    Missing delivery deviations fail every slider comparison, so the cube no
+    longer covers the default sliders and the app falls back to a cube of the
+    filtered rows; both paths must agree with the raw frame.
+    """
+    df = sample_dataset()
+    if missing_deviation:
+        df.loc[::9, 'delivery_time_deviation'] = np.nan
+    df, _ = app.enrich_dataset(df, f"kpis:{missing_deviation}")
+    ranges = {'delivery_time_deviation': (-2.0, 10.0), 'cargo_condition_status': (0.0, 1.0)}
+    start_date, end_date, risks = '2021-01-10', '2021-02-20', ['Low Risk', 'High Risk']
+    expected_rows = filtered_rows(df, start_date, end_date, risks, *ranges.values())
+    
+    cube = app.build_rollup_cube(df)
+    assert app.rollup_covers(cube, ranges) is not missing_deviation
+    if missing_deviation:
+        cube = app.build_rollup_cube(expected_rows)
+        cells = np.ones(len(cube['count']), dtype=bool)
+    else:
+        cells = app.rollup_cells(cube, start_date, end_date, risks)
+    
+    from_cube = app.compute_kpis(expected_rows, cube, cells)
+    from_rows = app.compute_kpis(expected_rows)
+    assert from_cube.shipments == from_rows.shipments == len(expected_rows)
+    for field in ['avg_cost', 'avg_delay', 'avg_delay_probability', 'avg_fulfillment']:
+        assert getattr(from_cube, field) == pytest.approx(getattr(from_rows, field))
+    for field in ['high_delay_count', 'critical_delay_count', 'high_risk_count', 'on_time_count']:
+        assert getattr(from_cube, field) == getattr(from_rows, field)
+
+
+def cube_cells(cube):
+    """A rollup cube's cells as a frame indexed by their day, risk and region labels."""
+    cells = pd.DataFrame({
+        'day': cube['days'][cube['day']],
+        'risk': np.asarray(cube['risks'], dtype=object)[cube['risk']],
+        'region': np.asarray(cube['regions'], dtype=object)[cube['region']],
+        'count': cube['count'],
+    })
+    for key in ['sum', 'sumsq', 'n', 'flags']:
+        for col, values in cube[key].items():
+            cells[f'{key}:{col}'] = values
+    return cells.set_index(['day', 'risk', 'region']).sort_index()
+
+
+def test_merged_rollup_cubes_match_single_build(app):
+    """Merging the cubes of two chunks equals building one cube over all rows."""
+    df = sample_dataset()
+    # The chunks share a day, and only the second holds a 'Critical Risk' label
+    df['risk_classification'] = df['risk_classification'].where(df.index < 1500, 'Critical Risk')
+    df.loc[::11, 'shipping_costs'] = np.nan
+    df, _ = app.enrich_dataset(df, "merge")
+    first, second = df.iloc[:1210], df.iloc[1210:]
+    assert first['ship_date'].iloc[-1] == second['ship_date'].iloc[0]
+    
+    merged = app.merge_rollup_cubes(app.build_rollup_cube(first), app.build_rollup_cube(second))
+    single = app.build_rollup_cube(df)
+    pd.testing.assert_frame_equal(cube_cells(merged), cube_cells(single), check_dtype=False)
+    assert merged['bounds'] == single['bounds']
+
+
+@pytest.mark.parametrize("start_date, end_date, risks", [
+    ('2021-01-01', '2021-03-31', ['Low Risk', 'Moderate Risk', 'High Risk']),
+    ('2021-01-01', '2021-03-31', ['Low Risk', 'Moderate Risk', 'High Risk', np.nan]),
+    ('2021-01-05', '2021-01-20', ['High Risk', np.nan]),
+    ('2021-01-05', '2021-01-20', []),
+    # A single day, at the start, inside and at the end of the data
+    ('2021-01-01', '2021-01-01', ['Low Risk', 'Moderate Risk', 'High Risk']),
+    ('2021-02-03', '2021-02-03', ['High Risk', np.nan]),
+    ('2021-03-25', '2021-03-25', ['Low Risk', 'Moderate Risk', 'High Risk', np.nan]),
+    # Ranges with no rows: before the data, after it, and reversed
+    ('2020-06-01', '2020-06-30', ['Low Risk']),
+    ('2030-01-01', '2030-01-31', ['Low Risk']),
+    ('2021-02-10', '2021-02-01', ['Low Risk', 'Moderate Risk', 'High Risk']),
+])
+def test_filter_masks_match_plain_filtering(app, start_date, end_date, risks):
+    """The date slice and packed filter bitmaps select the rows that plain isin and date comparisons do.
+    
+    Rows without a risk label are kept exactly when the missing value is
+    selected, as with Series.isin, and the rollup cube agrees. Single-day
+    and empty date ranges resolve to the matching (possibly empty) slice.
+    """
+    df = sample_dataset()
+    df.loc[::13, 'risk_classification'] = np.nan
+    df.loc[::17, 'cargo_condition_status'] = np.nan
+    df, _ = app.enrich_dataset(df, "filters")
+    deviation_range, cargo_range = (0.0, 6.5), (0.2, 1.0)
+    
+    rows = app.date_range_slice(df, start_date, end_date)
+    masks = [
+        app.cached_filter_mask(
+            'risk', tuple(sorted(map(str, risks))), 'filters', len(df),
+            lambda part: app.category_isin(df['risk_classification'].iloc[part], risks)),
+        app.cached_filter_mask(
+            'delivery_deviation', deviation_range, 'filters', len(df),
+            lambda part: df['delivery_time_deviation'].iloc[part].between(*deviation_range)),
+        app.cached_filter_mask(
+            'cargo_condition', cargo_range, 'filters', len(df),
+            lambda part: df['cargo_condition_status'].iloc[part].between(*cargo_range)),
+    ]
+    selected = df.iloc[rows][app.combine_filter_masks(masks, rows)]
+    pd.testing.assert_frame_equal(
+        selected, filtered_rows(df, start_date, end_date, risks, deviation_range, cargo_range))
+    
+    in_dates_and_risks = (
+        df['timestamp'].dt.normalize().between(pd.Timestamp(start_date), pd.Timestamp(end_date))
+        & df['risk_classification'].isin(risks)
+    )
+    cube = app.build_rollup_cube(df)
+    assert cube['count'][app.rollup_cells(cube, start_date, end_date, risks)].sum() == in_dates_and_risks.sum()
+
+
+@pytest.mark.parametrize("column", ['risk_classification', 'shipping_costs', 'ship_date', 'is_on_time'])
+@pytest.mark.parametrize("descending", [False, True])
+def test_sorted_view_matches_stable_sort_values(app, column, descending):
+    """Explorer sorting equals a stable sort_values in both directions, ties in row order and missing values last."""
+    df, _ = app.enrich_dataset(sample_dataset(), "sorting")
+    df['shipping_costs'] = df['shipping_costs'].round(-2)
+    df.loc[::9, 'shipping_costs'] = np.nan
+    df.loc[::11, 'risk_classification'] = np.nan
+    positions = np.flatnonzero(df['delay_probability'].to_numpy() > 0.3)
+    
+    # Built on part of the rows first, so appended rows are merged into the index
+    app.column_sort_order(df.iloc[:700], f"sorting:{column}", column, descending)
+    order, missing = app.column_sort_order(df, f"sorting:{column}", column, descending)
+    ordered = app.sorted_view_positions(positions, len(df), order, missing)
+    
+    expected = df.iloc[positions].sort_values(column, ascending=not descending, kind='stable').index
+    assert np.array_equal(ordered, expected.to_numpy())